@@ -1,10 +1,14 @@
 # main.py
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import FastAPI, Request, Form, HTTPException, Depends, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+import asyncio
+import queue
 import sqlite3
 import time
+from datetime import datetime
 from typing import List, Dict, Any
 # Import uvicorn for self-running
 import uvicorn
@@ -19,23 +23,96 @@ import uvicorn
 BASE_DIR = Path(__file__).resolve().parent
 # 1. Update: Point Jinja2Templates to the 'templates' subdirectory
 TEMPLATES = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# The template never changes while the server runs: skip the per-request
+# mtime check and compile it once up front
+TEMPLATES.env.auto_reload = False
+TEMPLATES.env.globals["zip"] = zip  # index.html iterates zip(rows, ts_strs)
+INDEX_TMPL = TEMPLATES.get_template("index.html")
 
 # 2. Update: Define the database folder and full path
 DB_FOLDER = BASE_DIR / "db"
 DB_FOLDER.mkdir(exist_ok=True) # Create the 'db' folder if it doesn't exist
-DATABASE_PATH = DB_FOLDER / "crud_fastapi.db"
+DATABASE_PATH = str(DB_FOLDER / "crud_fastapi.db")  # str once here, not a Path re-encoded on every connect
+
+# --- SQL Statements ---
+# Kept as constants so each connection's statement cache (keyed by SQL text)
+# compiles every query once and reuses it for the life of the pool
+SQL_SEARCH = (
+    "SELECT e.idx, e.eid, e.name, e.timestamp "
+    "FROM employees_fts f JOIN employees e ON e.idx = f.rowid "
+    "WHERE employees_fts MATCH ? ORDER BY e.idx DESC LIMIT ? OFFSET ?"
+)
+SQL_SEARCH_COUNT = "SELECT COUNT(*) FROM employees_fts WHERE employees_fts MATCH ?"
+SQL_LIST = "SELECT idx, eid, name, timestamp FROM employees ORDER BY idx DESC LIMIT ? OFFSET ?"
+SQL_COUNT = "SELECT COUNT(*) FROM employees"
+SQL_INSERT = (
+    "INSERT INTO employees (eid, name, timestamp) VALUES (?, ?, ?) "
+    "ON CONFLICT(eid) DO NOTHING RETURNING idx"
+)
+SQL_UPDATE = (
+    "UPDATE employees SET eid = ?, name = ?, timestamp = ? "
+    "WHERE idx = ? AND NOT EXISTS "
+    "(SELECT 1 FROM employees WHERE eid = ? AND idx <> ?) RETURNING idx"
+)
+SQL_IDX_EXISTS = "SELECT 1 FROM employees WHERE idx = ? LIMIT 1"
+SQL_DELETE = "DELETE FROM employees WHERE idx = ?"
+SQL_DATA_VERSION = "PRAGMA data_version"
+
+PAGE_SIZE = 100  # default rows per page on GET /
+
+# Connection pool: endpoints borrow a connection instead of opening a new one
+POOL_SIZE = 8
+POOL = queue.LifoQueue()
 
 app = FastAPI()
 
 # --- Database Functions ---
 
+def enable_wal_mode():
+    """Switches the database to WAL journaling (persistent, so it only runs once at startup)."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
 def get_db_connection():
     """Establishes and returns a SQLite database connection."""
     # 3. Update: Connect using the full database path
-    conn = sqlite3.connect(DATABASE_PATH)
+    # check_same_thread=False lets the connection cross FastAPI's threadpool
+    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    # Per-connection tuning (WAL itself is already set by enable_wal_mode)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA busy_timeout=5000")  # Wait out WAL checkpoints instead of failing with SQLITE_BUSY
     return conn
 
+def init_pool():
+    """Pre-fills the pool with configured connections."""
+    for _ in range(POOL_SIZE):
+        POOL.put(get_db_connection())
+
+def get_conn():
+    """Dependency that lends a pooled connection to an endpoint for one request."""
+    conn = POOL.get()
+    try:
+        yield conn
+    finally:
+        # Never hand a half-finished transaction to the next request
+        if conn.in_transaction:
+            conn.rollback()
+        POOL.put(conn)
+
+def fetch_all(conn, sql, params=()):
+    """Runs a query and returns all rows; called via run_in_threadpool so reads don't block the event loop."""
+    return conn.execute(sql, params).fetchall()
+
+def fts_prefix_query(search):
+    """Quotes the search text as an FTS5 prefix phrase (so user input is never parsed as FTS syntax)."""
+    return '"' + search.replace('"', '""') + '"*'
+
 def create_table():
     """Creates the 'employees' table if it doesn't exist."""
     conn = get_db_connection()
@@ -48,47 +125,115 @@ def create_table():
                 timestamp REAL
             );
         """)
+        # UNIQUE(eid) already backs the EID lookups with an index; name gets its own
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_name ON employees(name)")
+        # Full-text index over eid/name for the search box, kept in sync by triggers
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'employees_fts'"
+        ).fetchone()
+        conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+                eid, name, content='employees', content_rowid='idx'
+            );
+            CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN
+                INSERT INTO employees_fts(rowid, eid, name) VALUES (new.idx, new.eid, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN
+                INSERT INTO employees_fts(employees_fts, rowid, eid, name)
+                VALUES ('delete', old.idx, old.eid, old.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE ON employees BEGIN
+                INSERT INTO employees_fts(employees_fts, rowid, eid, name)
+                VALUES ('delete', old.idx, old.eid, old.name);
+                INSERT INTO employees_fts(rowid, eid, name) VALUES (new.idx, new.eid, new.name);
+            END;
+        """)
+        if not fts_exists:
+            # Index the rows that existed before the FTS table was added
+            conn.execute("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')")
         conn.commit()
+        # Refresh planner statistics so the indexes are chosen deterministically
+        conn.execute("ANALYZE")
     finally:
         conn.close()
 
 # Initialize database table on startup
+enable_wal_mode()
 create_table()
+init_pool()
+
+# Single writer: SQLite serializes writes anyway, so every INSERT/UPDATE/DELETE
+# goes through this one connection, one request at a time (reads use the POOL)
+WRITE_CONN = get_db_connection()
+WRITE_LOCK = asyncio.Lock()
+
+# Rendered landing page, per pooled reader connection: {conn: (data_version, html)}
+# PRAGMA data_version changes whenever *another* connection commits, and every
+# write goes through WRITE_CONN, so a stale entry is detected on the next read
+PAGE_CACHE = {}
+
+@app.on_event("shutdown")
+def close_pool():
+    """Drains the pool and closes every connection."""
+    while not POOL.empty():
+        POOL.get_nowait().close()
+    WRITE_CONN.close()
 
 # --- FastAPI Endpoints (No changes needed to endpoint logic) ---
 
 @app.get("/", response_class=HTMLResponse)
-async def read_employees(request: Request, search: str = None):
-    # ... (function body remains the same, just uses the new get_db_connection)
-    conn = get_db_connection()
-    employees = []
-    
-    try:
-        if search:
-            cursor = conn.execute(
-                "SELECT * FROM employees WHERE eid LIKE ? OR name LIKE ? ORDER BY idx DESC",
-                (f"%{search}%", f"%{search}%")
-            )
-        else:
-            cursor = conn.execute("SELECT * FROM employees ORDER BY idx DESC")
-            
-        employees = cursor.fetchall()
-    finally:
-        conn.close()
+async def read_employees(
+    request: Request,
+    search: str = None,
+    skip: int = Query(0, ge=0),             # Query Parameter for Offset
+    limit: int = Query(PAGE_SIZE, ge=1, le=1000), # Query Parameter for Limit (bounds the page size)
+    conn: sqlite3.Connection = Depends(get_conn)
+):
+    # ... (function body remains the same, just uses the pooled connection)
+    # The plain landing page is served from PAGE_CACHE until the next write
+    cacheable = not search and skip == 0 and limit == PAGE_SIZE
+    if cacheable:
+        data_version = (await run_in_threadpool(fetch_all, conn, SQL_DATA_VERSION))[0][0]
+        cached = PAGE_CACHE.get(conn)
+        if cached and cached[0] == data_version:
+            return HTMLResponse(cached[1])
 
-    employee_list = []
-    for emp in employees:
-        employee_dict = dict(emp)
-        employee_dict['timestamp_str'] = time.strftime(
-            '%Y-%m-%d %H:%M:%S', 
-            time.localtime(employee_dict['timestamp'])
+    count_params = ()
+    if search:
+        rows = await run_in_threadpool(
+            fetch_all,
+            conn,
+            SQL_SEARCH,
+            (fts_prefix_query(search), limit, skip)
+        )
+        count_sql = SQL_SEARCH_COUNT
+        count_params = (fts_prefix_query(search),)
+    else:
+        rows = await run_in_threadpool(
+            fetch_all,
+            conn,
+            SQL_LIST,
+            (limit, skip)
         )
-        employee_list.append(employee_dict)
+        count_sql = SQL_COUNT
+
+    # Total matching rows, for the pagination links
+    total = (await run_in_threadpool(fetch_all, conn, count_sql, count_params))[0][0]
+
+    # Format every timestamp in one pass (fromtimestamp bound locally; isoformat avoids strftime's format parsing)
+    # The template reads the sqlite3.Row objects directly, paired with these strings
+    fromtimestamp = datetime.fromtimestamp
+    ts_strs = [
+        fromtimestamp(emp['timestamp']).isoformat(sep=' ', timespec='seconds') for emp in rows
+    ]
         
-    return TEMPLATES.TemplateResponse(
-        "index.html", 
-        {"request": request, "employees": employee_list, "search_term": search}
+    html = INDEX_TMPL.render(
+        request=request, rows=rows, ts_strs=ts_strs, search_term=search,
+        skip=skip, limit=limit, total=total
     )
+    if cacheable:
+        PAGE_CACHE[conn] = (data_version, html)
+    return HTMLResponse(html)
 
 # CREATE - Upon Client Page Submit the Form
 @app.post("/add", response_class=RedirectResponse)
@@ -97,30 +242,32 @@ async def add_employee(
     eid: str = Form(...),
     name: str = Form(...)
 ):
-    # ... (function body remains the same, uses the new get_db_connection)
-    conn = get_db_connection()
-    try:
-        cursor = conn.execute("SELECT eid FROM employees WHERE eid = ?", (eid,))
-        if cursor.fetchone():
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Employee with EID '{eid}' already exists."
+    # ... (function body remains the same, uses the single writer connection)
+    async with WRITE_LOCK:
+        try:
+            # One statement: the insert is skipped (no row returned) if the EID exists
+            cursor = await run_in_threadpool(
+                WRITE_CONN.execute,
+                SQL_INSERT,
+                (eid, name, time.time())
             )
+            if cursor.fetchone() is None:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Employee with EID '{eid}' already exists."
+                )
 
-        conn.execute(
-            "INSERT INTO employees (eid, name, timestamp) VALUES (?, ?, ?)",
-            (eid, name, time.time())
-        )
-        conn.commit()
-    except HTTPException:
-        raise
-    except sqlite3.Error as e:
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Database error: {e}"
-        )
-    finally:
-        conn.close()
+            await run_in_threadpool(WRITE_CONN.commit)
+        except HTTPException:
+            raise
+        except sqlite3.Error as e:
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Database error: {e}"
+            )
+        finally:
+            if WRITE_CONN.in_transaction:
+                WRITE_CONN.rollback()
 
 
     return RedirectResponse(url="/", status_code=303)
@@ -133,33 +280,37 @@ async def update_employee(
     eid: str = Form(...),
     name: str = Form(...)
 ):
-    # ... (function body remains the same, uses the new get_db_connection)
-    conn = get_db_connection()
-    try:
-        cursor = conn.execute(
-            "SELECT idx FROM employees WHERE eid = ? AND idx != ?", 
-            (eid, idx)
-        )
-        if cursor.fetchone():
-            raise HTTPException(
-                status_code=400, 
-                detail=f"EID '{eid}' is already used by another employee."
+    # ... (function body remains the same, uses the single writer connection)
+    async with WRITE_LOCK:
+        try:
+            # One statement: the update only applies if no other employee has the EID
+            cursor = await run_in_threadpool(
+                WRITE_CONN.execute,
+                SQL_UPDATE,
+                (eid, name, time.time(), idx, eid, idx)
             )
+            if cursor.fetchone() is None:
+                # Nothing updated: either the EID is taken or the row is gone
+                cursor = await run_in_threadpool(
+                    WRITE_CONN.execute, SQL_IDX_EXISTS, (idx,)
+                )
+                if cursor.fetchone():
+                    raise HTTPException(
+                        status_code=400, 
+                        detail=f"EID '{eid}' is already used by another employee."
+                    )
 
-        conn.execute(
-            "UPDATE employees SET eid = ?, name = ?, timestamp = ? WHERE idx = ?",
-            (eid, name, time.time(), idx)
-        )
-        conn.commit()
-    except HTTPException:
-        raise
-    except sqlite3.Error as e:
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Database error: {e}"
-        )
-    finally:
-        conn.close()
+            await run_in_threadpool(WRITE_CONN.commit)
+        except HTTPException:
+            raise
+        except sqlite3.Error as e:
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Database error: {e}"
+            )
+        finally:
+            if WRITE_CONN.in_transaction:
+                WRITE_CONN.rollback()
    
 
     return RedirectResponse(url="/", status_code=303)
@@ -167,20 +318,23 @@ async def update_employee(
 
 @app.post("/delete/{idx}", response_class=RedirectResponse)
 async def delete_employee(idx: int):
-    # ... (function body remains the same, uses the new get_db_connection)
-    conn = get_db_connection()
-    try:
-        conn.execute("DELETE FROM employees WHERE idx = ?", (idx,))
-        conn.commit()
-    
+    # ... (function body remains the same, uses the single writer connection)
+    async with WRITE_LOCK:
+        try:
+            await run_in_threadpool(
+                WRITE_CONN.execute, SQL_DELETE, (idx,)
+            )
+            await run_in_threadpool(WRITE_CONN.commit)
+        
 
-    except sqlite3.Error as e:
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Database error: {e}"
-        )
-    finally:
-        conn.close()
+        except sqlite3.Error as e:
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Database error: {e}"
+            )
+        finally:
+            if WRITE_CONN.in_transaction:
+                WRITE_CONN.rollback()
 
     return RedirectResponse(url="/", status_code=303)
 
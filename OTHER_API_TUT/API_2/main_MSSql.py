@@ -1,16 +1,19 @@
 # main.py
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import FastAPI, Request, Form, HTTPException, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 import pyodbc # ⬅️ NEW: Used for MS SQL Server connection
+import queue
 import time
+from datetime import datetime
 from typing import List, Dict, Any
 import uvicorn
 
 # --- Setup ---
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+TEMPLATES.env.globals["zip"] = zip  # index.html iterates zip(rows, ts_strs)
 
 # --- MS SQL CONNECTION CONFIGURATION ---
 # ⚠️ IMPORTANT: These must match your docker run command settings
@@ -29,6 +32,40 @@ CONN_STR = (
     f'PWD={PASSWORD}'
 )
 
+# --- T-SQL statements ---
+# Each write is a single MERGE so the duplicate check and the write share one
+# round-trip; OUTPUT $action returns a row only when the write happened.
+# HOLDLOCK keeps the ON match and the insert atomic under concurrent requests.
+SQL_MERGE_INSERT = """
+    MERGE employees WITH (HOLDLOCK) AS t
+    USING (VALUES (?, ?, ?)) AS s(eid, name, ts)
+    ON t.eid = s.eid
+    WHEN NOT MATCHED THEN
+        INSERT (eid, name, timestamp) VALUES (s.eid, s.name, s.ts)
+    OUTPUT $action;
+"""
+SQL_MERGE_UPDATE = """
+    MERGE employees WITH (HOLDLOCK) AS t
+    USING (VALUES (?, ?, ?, ?)) AS s(idx, eid, name, ts)
+    ON t.idx = s.idx
+    WHEN MATCHED AND NOT EXISTS (
+        SELECT 1 FROM employees WHERE eid = s.eid AND idx <> s.idx
+    ) THEN
+        UPDATE SET eid = s.eid, name = s.name, timestamp = s.ts
+    OUTPUT $action;
+"""
+SQL_IDX_EXISTS = "SELECT TOP 1 1 FROM employees WHERE idx = ?"
+
+# ODBC handshake + login is the slowest part of a request, so connections are
+# opened once at startup and lent out per request (see get_conn)
+pyodbc.pooling = True  # driver-manager pooling too; must be set before the first connect
+POOL_SIZE = 10
+# Seconds a request waits for a free slot before failing with a 503
+POOL_TIMEOUT = 30
+# Each slot holds a connection, or None after that connection broke: the slot
+# is always returned and reconnected lazily on its next checkout
+POOL = queue.LifoQueue()
+
 app = FastAPI()
 
 # --- Database Functions (Updated for pyodbc and T-SQL) ---
@@ -36,8 +73,9 @@ app = FastAPI()
 def get_db_connection():
     """Establishes and returns a pyodbc SQL Server connection."""
     try:
-        # autocommit=True is often helpful for simple web application transactions
-        conn = pyodbc.connect(CONN_STR, autocommit=True)
+        # autocommit=False: each endpoint runs as one transaction and ends it
+        # explicitly with commit() on success or rollback_quietly() on error
+        conn = pyodbc.connect(CONN_STR, autocommit=False)
         return conn
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
@@ -84,8 +122,71 @@ def create_table():
             print(f"Error during table creation: {e}")
             raise
         
-# Initialize database table on startup
+def init_pool():
+    """Pre-fills the pool with open connections."""
+    for _ in range(POOL_SIZE):
+        POOL.put(get_db_connection())
+
+def close_quietly(conn):
+    """Closes a connection that may already be dead."""
+    try:
+        conn.close()
+    except pyodbc.Error:
+        pass
+
+def rollback_quietly(conn):
+    """Rolls back on an endpoint's error path without masking the error being reported.
+
+    If the connection has dropped, rollback() raises too; get_conn's teardown
+    then replaces the connection, so there is nothing more to do here.
+    """
+    try:
+        conn.rollback()
+    except pyodbc.Error:
+        pass
+
+def get_conn():
+    """Dependency that lends a pooled connection to an endpoint for one request."""
+    try:
+        conn = POOL.get(timeout=POOL_TIMEOUT)
+    except queue.Empty:
+        raise HTTPException(status_code=503, detail="No database connection available, try again later.")
+    try:
+        if conn is None:
+            conn = get_db_connection()
+        else:
+            try:
+                # Idle connections can be dropped by the server; swap in a fresh one
+                conn.execute("SELECT 1").fetchone()
+            except pyodbc.Error:
+                close_quietly(conn)
+                conn = get_db_connection()
+    except RuntimeError as e:
+        # Server unreachable: give the slot back empty and fail this request only
+        POOL.put(None)
+        raise HTTPException(status_code=503, detail=str(e))
+    try:
+        yield conn
+    finally:
+        try:
+            # Never hand a half-finished transaction to the next request
+            conn.rollback()
+        except pyodbc.Error:
+            close_quietly(conn)
+            conn = None
+        POOL.put(conn)
+
+# Initialize database table and connection pool on startup
 create_table()
+init_pool()
+
+@app.on_event("shutdown")
+def close_pool():
+    """Drains the pool and closes every connection."""
+    while not POOL.empty():
+        conn = POOL.get_nowait()
+        if conn is not None:
+            close_quietly(conn)
 
 # --- FastAPI Endpoints ---
 
@@ -94,45 +195,35 @@ async def read_employees(
     request: Request, 
     search: str = None, 
     skip: int = 0,       # ⬅️ Query Parameter for Offset
-    limit: int = 100     # ⬅️ Query Parameter for Limit
+    limit: int = 100,    # ⬅️ Query Parameter for Limit
+    conn: pyodbc.Connection = Depends(get_conn)
 ):
-    conn = get_db_connection()
+    base_query = "SELECT idx, eid, name, timestamp FROM employees "
+    params = []
     
-    try:
-        base_query = "SELECT * FROM employees "
-        params = []
-        
-        if search:
-            # SQL Server uses CONCAT or + for string concatenation
-            base_query += "WHERE eid LIKE CONCAT('%', ?, '%') OR name LIKE CONCAT('%', ?, '%') "
-            params.extend([search, search]) 
-        
-        # ⬅️ SQL Server Pagination Syntax
-        base_query += "ORDER BY idx DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
-        params.extend([skip, limit]) 
-            
-        cursor = conn.execute(base_query, params)
+    if search:
+        # SQL Server uses CONCAT or + for string concatenation
+        base_query += "WHERE eid LIKE CONCAT('%', ?, '%') OR name LIKE CONCAT('%', ?, '%') "
+        params.extend([search, search]) 
+    
+    # ⬅️ SQL Server Pagination Syntax
+    base_query += "ORDER BY idx DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+    params.extend([skip, limit]) 
         
-        # pyodbc doesn't have a built-in row_factory, so we convert tuples to dicts manually
-        columns = [column[0] for column in cursor.description]
-        rows = cursor.fetchall()
-        employees = [dict(zip(columns, row)) for row in rows]
-
-    finally:
-        conn.close()
+    # pyodbc.Row already exposes columns as attributes (row.eid, row.name),
+    # so rows go to the template as-is without building a dict per row
+    rows = conn.execute(base_query, params).fetchall()
 
-    employee_list = []
-    for emp in employees:
-        employee_dict = dict(emp)
-        employee_dict['timestamp_str'] = time.strftime(
-            '%Y-%m-%d %H:%M:%S', 
-            time.localtime(employee_dict['timestamp'])
-        )
-        employee_list.append(employee_dict)
+    # index.html pairs each row with its formatted timestamp via zip(rows, ts_strs)
+    fromtimestamp = datetime.fromtimestamp
+    ts_strs = [
+        fromtimestamp(row.timestamp).isoformat(sep=' ', timespec='seconds')
+        for row in rows
+    ]
         
     return TEMPLATES.TemplateResponse(
         "index.html", 
-        {"request": request, "employees": employee_list, "search_term": search}
+        {"request": request, "rows": rows, "ts_strs": ts_strs, "search_term": search}
     )
 
 # --- POST ENDPOINTS (Logic remains similar, errors changed) ---
@@ -141,31 +232,27 @@ async def read_employees(
 async def add_employee(
     request: Request,
     eid: str = Form(...),
-    name: str = Form(...)
+    name: str = Form(...),
+    conn: pyodbc.Connection = Depends(get_conn)
 ):
-    conn = get_db_connection()
     try:
-        cursor = conn.execute("SELECT eid FROM employees WHERE eid = ?", (eid,))
-        if cursor.fetchone():
+        cursor = conn.execute(SQL_MERGE_INSERT, (eid, name, time.time()))
+        if cursor.fetchone() is None:
+            # ON matched an existing EID, so nothing was inserted
             raise HTTPException(
                 status_code=400, 
                 detail=f"Employee with EID '{eid}' already exists."
             )
-
-        conn.execute(
-            "INSERT INTO employees (eid, name, timestamp) VALUES (?, ?, ?)",
-            (eid, name, time.time())
-        )
         conn.commit()
     except HTTPException:
+        rollback_quietly(conn)
         raise
     except pyodbc.Error as e: # ⬅️ Changed error type
+        rollback_quietly(conn)
         raise HTTPException(
             status_code=500, 
             detail=f"Database error: {e}"
         )
-    finally:
-        conn.close()
 
     return RedirectResponse(url="/", status_code=303)
 
@@ -174,51 +261,44 @@ async def update_employee(
     idx: int,
     request: Request,
     eid: str = Form(...),
-    name: str = Form(...)
+    name: str = Form(...),
+    conn: pyodbc.Connection = Depends(get_conn)
 ):
-    conn = get_db_connection()
     try:
-        cursor = conn.execute(
-            "SELECT idx FROM employees WHERE eid = ? AND idx != ?", 
-            (eid, idx)
-        )
-        if cursor.fetchone():
-            raise HTTPException(
-                status_code=400, 
-                detail=f"EID '{eid}' is already used by another employee."
-            )
-
-        conn.execute(
-            "UPDATE employees SET eid = ?, name = ?, timestamp = ? WHERE idx = ?",
-            (eid, name, time.time(), idx)
-        )
+        cursor = conn.execute(SQL_MERGE_UPDATE, (idx, eid, name, time.time()))
+        if cursor.fetchone() is None:
+            # Nothing updated: either idx is gone (redirect as before) or the
+            # EID belongs to another row. Only this path pays a second query.
+            if conn.execute(SQL_IDX_EXISTS, (idx,)).fetchone():
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"EID '{eid}' is already used by another employee."
+                )
         conn.commit()
     except HTTPException:
+        rollback_quietly(conn)
         raise
     except pyodbc.Error as e: # ⬅️ Changed error type
+        rollback_quietly(conn)
         raise HTTPException(
             status_code=500, 
             detail=f"Database error: {e}"
         )
-    finally:
-        conn.close()
-        
+
     return RedirectResponse(url="/", status_code=303)
 
 
 @app.post("/delete/{idx}", response_class=RedirectResponse)
-async def delete_employee(idx: int):
-    conn = get_db_connection()
+async def delete_employee(idx: int, conn: pyodbc.Connection = Depends(get_conn)):
     try:
         conn.execute("DELETE FROM employees WHERE idx = ?", (idx,))
         conn.commit()
     except pyodbc.Error as e: # ⬅️ Changed error type
+        rollback_quietly(conn)
         raise HTTPException(
             status_code=500, 
             detail=f"Database error: {e}"
         )
-    finally:
-        conn.close()
 
     return RedirectResponse(url="/", status_code=303)
 
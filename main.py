@@ -2,28 +2,42 @@
 
 import sqlite3
 import os
-import json
 import csv
+import logging
+import threading
+import time
 from datetime import datetime
 from typing import List, Optional
 from contextlib import asynccontextmanager
-from io import StringIO
 
 import uvicorn
 
-from fastapi import FastAPI, Depends, HTTPException, Request, APIRouter
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, Depends, HTTPException, Request, APIRouter, BackgroundTasks
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 
 import tomllib  # Python 3.11+ built-in
 
+import orjson
+
 from pydantic import BaseModel, Field
 
 # --- LOAD CONFIG --- (For Future Use - Variables Parameterized)
-with open("config.toml", "rb") as f:
-    config = tomllib.load(f)
+# Read in lifespan() (once per worker), not at import, and kept on app.state.config
+CONFIG_FILE = "config.toml"
+
+def load_config():
+    """Reads and parses CONFIG_FILE."""
+    with open(CONFIG_FILE, "rb") as f:
+        return tomllib.load(f)
+
+def get_log_level(config):
+    """Log level for uvicorn and this app ("debug" shows the diagnostics below)."""
+    return config.get("server", {}).get("log_level", "info")
 
+logger = logging.getLogger(__name__)
 
 # --- Configuration and Setup ---
 
@@ -33,7 +47,7 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_DIR = "db"
 SQLITE_FILE = os.path.join(DB_DIR, "database.db")
 
-# Create necessary directories if they don't exist
+# Created by lifespan() if they don't exist
 TEMPLATES_DIR = "templates"
 STATIC_DIR = "static"
 
@@ -43,28 +57,125 @@ MAIN_PAGE = f"{MAIN_PAGE}.html"
 
 WELCOME_PAGE = "welcome.html"     
 
-# For Debugging use
-CREATE_CSV = True # this will export the data directly to the backend
-CREATE_JSON = True
+# Columns as the JSON endpoints return them (list/search SELECTs and the
+# create/update RETURNING clauses). Rows go straight to ORJSONResponse (no
+# RecordInDB per row), so the timestamp is put in ISO 8601 form ("T"
+# separator) here, the same shape the Pydantic model used to emit
+RECORD_JSON_COLUMNS = "id, name, rights, status, remarks, replace(timestamp, ' ', 'T') AS timestamp"
+# Stored columns as-is (the CSV export keeps the raw timestamp; the debug
+# dump, fed the JSON rows, puts the space back itself)
+RECORD_COLUMNS = "id, name, rights, status, remarks, timestamp"
+
+# --- SQL statements (fixed text, so SQLite's statement cache reuses each one) ---
+SQL_LIST = f"SELECT {RECORD_JSON_COLUMNS} FROM records ORDER BY id DESC"
+SQL_SEARCH_FTS = f"""
+    SELECT {RECORD_JSON_COLUMNS} FROM records
+    WHERE id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)
+    ORDER BY id DESC
+"""
+SQL_SEARCH_LIKE = f"""
+    SELECT {RECORD_JSON_COLUMNS} FROM records
+    WHERE name LIKE ? OR remarks LIKE ?
+    ORDER BY id DESC
+"""
+SQL_INSERT = "INSERT INTO records (name, rights, status, remarks) VALUES (?, ?, ?, ?)"
+# RETURNING hands back the stored row (id, default timestamp) in the same statement
+SQL_INSERT_RETURNING = f"{SQL_INSERT} RETURNING {RECORD_JSON_COLUMNS}"
+SQL_DELETE = "DELETE FROM records WHERE id = ?"
+SQL_EXPORT_CSV = f"SELECT {RECORD_COLUMNS} FROM records ORDER BY id DESC"
+
+# The trigram full-text index only matches queries of at least this many
+# characters; shorter ones use the LIKE scan
+FTS_MIN_QUERY_LENGTH = 3
+
+# Every UPDATE update_record can issue, keyed by a bitmask of the fields sent
+# (bit i set = RECORD_UPDATE_FIELDS[i] is not None). Fixed SQL text per mask
+# means SQLite's statement cache is hit instead of re-preparing each request
+RECORD_UPDATE_FIELDS = ("name", "rights", "status", "remarks")
+UPDATE_STMTS = {
+    mask: (
+        "UPDATE records SET "
+        + ", ".join(f"{field} = ?" for bit, field in enumerate(RECORD_UPDATE_FIELDS) if mask >> bit & 1)
+        + f", timestamp = CURRENT_TIMESTAMP WHERE id = ? RETURNING {RECORD_JSON_COLUMNS}"
+    )
+    for mask in range(1, 1 << len(RECORD_UPDATE_FIELDS))
+}
+
+# Rows per chunk yielded by the streaming CSV / JSON exports
+EXPORT_BATCH_SIZE = 500
+
+# CSV layout shared by the export endpoint and the debug dump
+_CSV_FIELDNAMES = ['id', 'name', 'rights', 'status', 'remarks', 'timestamp']
+_CSV_HEADER_ROW = dict(zip(_CSV_FIELDNAMES, ['ID', 'Name', 'Rights', 'Status', 'Remarks', 'Timestamp']))
+_CSV_HEADER_LINE = "ID,Name,Rights,Status,Remarks,Timestamp\r\n"
+
+# Applied once to the reader and writer connections opened in lifespan()
+SHARED_DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers don't block the writer (persistent)
+    "PRAGMA synchronous=NORMAL",    # fsync at checkpoints, not every commit
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",     # ~64 MB page cache, kept warm across requests
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped reads
+)
 
+# SQLite serializes writers anyway; this keeps two requests from interleaving
+# statements/commits (or a bulk BEGIN/COMMIT) on the writer connection
+DB_WRITE_LOCK = threading.Lock()
 
-# this will create Folder if not exist
-os.makedirs(TEMPLATES_DIR, exist_ok=True)
-os.makedirs(STATIC_DIR, exist_ok=True)
-os.makedirs(DB_DIR, exist_ok=True)
 
 # --- Database Helper Functions ---
 
 def get_db_connection():
     """Establishes a connection to the SQLite database."""
     try:
-        conn = sqlite3.connect(SQLITE_FILE)
+        # check_same_thread=False: a streamed export is iterated from worker threads
+        conn = sqlite3.connect(SQLITE_FILE, check_same_thread=False)
         conn.row_factory = sqlite3.Row
         return conn
     except sqlite3.Error as e:
         print(f"Database connection error: {e}")
         return None
 
+def get_db(request: Request) -> sqlite3.Connection:
+    """Dependency: the long-lived reader connection opened in lifespan()."""
+    return request.app.state.db
+
+def get_write_db(request: Request) -> sqlite3.Connection:
+    """Dependency: the long-lived writer connection opened in lifespan()."""
+    return request.app.state.write_db
+
+# The sqlite3 driver blocks, so every endpoint query runs on a worker thread
+# (run_in_threadpool) and the event loop keeps serving other requests.
+# Reads skip DB_WRITE_LOCK because they never share a connection with a write:
+# - the reader connection (get_db) only runs SELECTs, so it never has to turn a
+#   read snapshot into a write (a stale one fails with "database is locked"),
+#   and it never sees another request's uncommitted BEGIN.
+# - every write, bulk BEGIN/COMMIT included, runs on the writer connection
+#   (get_write_db) and only while holding DB_WRITE_LOCK.
+
+def _fetch_all(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+def _write_fetch_one(conn, sql, params):
+    with DB_WRITE_LOCK:
+        return conn.execute(sql, params).fetchone()
+
+def _write_rowcount(conn, sql, params):
+    with DB_WRITE_LOCK:
+        return conn.execute(sql, params).rowcount
+
+async def db_fetch_all(conn, sql, params=()):
+    """Runs a read off the event loop and returns all rows."""
+    return await run_in_threadpool(_fetch_all, conn, sql, params)
+
+async def db_write_fetch_one(conn, sql, params=()):
+    """Runs a write (INSERT/UPDATE ... RETURNING) off the event loop; returns the row or None."""
+    return await run_in_threadpool(_write_fetch_one, conn, sql, params)
+
+async def db_write_rowcount(conn, sql, params=()):
+    """Runs a write off the event loop and returns how many rows it changed."""
+    return await run_in_threadpool(_write_rowcount, conn, sql, params)
+
 def init_db():
     """Initializes the database: creates the table structure."""
     os.makedirs(DB_DIR, exist_ok=True) 
@@ -77,13 +188,40 @@ def init_db():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS records (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
+            name TEXT NOT NULL COLLATE NOCASE,
             rights TEXT NOT NULL,
             status TEXT NOT NULL,
-            remarks TEXT,
+            remarks TEXT COLLATE NOCASE,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         );
     """)
+
+    # Full-text index over name/remarks for /api/search, kept in sync by triggers.
+    # The trigram tokenizer matches any substring (case-insensitive), like the
+    # original LIKE '%q%' search, without scanning the whole table
+    fts_exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'records_fts'"
+    ).fetchone()
+    cursor.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+            name, remarks, content='records', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS records_fts_ai AFTER INSERT ON records BEGIN
+            INSERT INTO records_fts(rowid, name, remarks) VALUES (new.id, new.name, new.remarks);
+        END;
+        CREATE TRIGGER IF NOT EXISTS records_fts_ad AFTER DELETE ON records BEGIN
+            INSERT INTO records_fts(records_fts, rowid, name, remarks)
+            VALUES ('delete', old.id, old.name, old.remarks);
+        END;
+        CREATE TRIGGER IF NOT EXISTS records_fts_au AFTER UPDATE ON records BEGIN
+            INSERT INTO records_fts(records_fts, rowid, name, remarks)
+            VALUES ('delete', old.id, old.name, old.remarks);
+            INSERT INTO records_fts(rowid, name, remarks) VALUES (new.id, new.name, new.remarks);
+        END;
+    """)
+    if not fts_exists:
+        # Index the rows that existed before the FTS table was added
+        cursor.execute("INSERT INTO records_fts(records_fts) VALUES ('rebuild')")
     conn.commit()
     
     print("Database structure initialized.")
@@ -95,8 +233,49 @@ def init_db():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events."""
+    if not getattr(app.state, "config_loaded", False):
+        config = load_config()
+        app.state.config = config
+        logging.basicConfig(level=get_log_level(config).upper(), format="%(levelname)s:     %(message)s")
+
+        # For Debugging use: dump every /api/records/all result to a file on the backend.
+        # Off unless enabled in config.toml under [debug]
+        debug_config = config.get("debug", {})
+        app.state.create_csv = debug_config.get("create_csv", False)
+        # Re-read edited templates without a restart (development only)
+        app.state.template_auto_reload = debug_config.get("template_auto_reload", False)
+
+        # this will create Folder if not exist (init_db creates DB_DIR)
+        os.makedirs(TEMPLATES_DIR, exist_ok=True)
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        app.state.config_loaded = True
+
     init_db()
+
+    # One reader and one writer connection for the whole app, so their page
+    # caches survive between requests (see the note above _fetch_all)
+    conn = get_db_connection()
+    write_conn = get_db_connection()
+    if conn is None or write_conn is None:
+        raise RuntimeError("Could not open the shared database connections.")
+    # Autocommit: each single-row write is its own transaction, no implicit
+    # BEGIN/COMMIT pair; the bulk insert issues BEGIN/COMMIT itself
+    write_conn.isolation_level = None
+    for pragma in SHARED_DB_PRAGMAS:
+        conn.execute(pragma)
+        write_conn.execute(pragma)
+    app.state.db = conn
+    app.state.write_db = write_conn
+
+    # The two pages always render the same templates: load them once
+    templates.env.auto_reload = app.state.template_auto_reload
+    app.state.tmpl_welcome = templates.get_template(WELCOME_PAGE)
+    app.state.tmpl_main = templates.get_template(MAIN_PAGE)
+
     yield
+
+    conn.close()
+    write_conn.close()
     print("Application shut down.")
 
 
@@ -108,7 +287,8 @@ app = FastAPI(
 )
 
 # Setup Templates and Static Files
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# check_dir=False: STATIC_DIR is created in lifespan(), after this runs
+app.mount("/static", StaticFiles(directory=STATIC_DIR, check_dir=False), name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 # --- Pydantic Models for Data Validation and Serialization ---
@@ -134,282 +314,315 @@ class RecordInDB(RecordBase):
 
 
 
-# --- API Router for CRUD Operations ---
+def _export_filename(extension):
+    """records_export_YYYYMMDD_HHMMSS.<extension>, stamped with the current local time."""
+    return f"records_export_{time.strftime('%Y%m%d_%H%M%S')}.{extension}"
 
-api_router = APIRouter(prefix="/api")
 
-# curl -s -X GET "http://127.0.0.1:8000/api/records/all" | jq
-# winget install jqlang.jq
-# this will retrieve all Records (VIEW)
-@api_router.get("/records/all", response_model=List[RecordInDB])
-async def get_all_records():
-    """Fetch all records from the database with Export to CSV Feature """
-    conn = get_db_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection error.")
-    
-    records = conn.execute("SELECT * FROM records ORDER BY id DESC").fetchall()
-    
-    # Export to CSV Backend Side, if Conditioning is CREATE_CSV=True -------------------
-    if CREATE_CSV:
-        try:
-            # Create CSV file
-            csv_filename = f"records_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            csv_filepath = os.path.join(BASE_DIR, csv_filename)
-            
-            with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['ID', 'Name', 'Rights', 'Status', 'Remarks', 'Timestamp'])
-                
-                # Write data rows
-                for record in records:
-                    writer.writerow([
-                        record['id'],
-                        record['name'],
-                        record['rights'],
-                        record['status'],
-                        record['remarks'] or '',
-                        record['timestamp']
-                    ])
-            
-            print(f"CSV exported successfully: {csv_filepath}")
-        except Exception as e:
-            print(f"CSV export failed: {e}")
-    # Export to CSV -------------------
-
-
-    # Export to JSON automatically -------------------
-    if CREATE_JSON:
-        try:
-            # Convert rows → list of dicts
-            processed_records = []
-            for r in records:
-                processed_records.append(dict(r))   # convert Row → dict
+# --- Debug Export Helpers ---
+# Queued as BackgroundTasks by get_all_records when create_csv is on
+# (a JSON copy is available on demand from /api/export/json).
+# Plain (sync) functions, so Starlette runs them in its threadpool, off the event loop.
 
-            # Build filename
-            json_filename = f"records_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            json_filepath = os.path.join(BASE_DIR, json_filename)
+def _dump_records_csv(rows):
+    """Writes a timestamped CSV copy of rows (dicts) next to main.py.
 
-            # JSON string
-            json_data = json.dumps(processed_records, indent=4, default=str)
+    rows are the JSON-shaped /api/records/all rows; the timestamp is written back
+    in its stored form ("YYYY-MM-DD HH:MM:SS"), matching /api/export/csv.
+    """
+    try:
+        # Create CSV file
+        csv_filepath = os.path.join(BASE_DIR, _export_filename("csv"))
+        
+        with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=_CSV_FIELDNAMES)
+            
+            # Write header
+            writer.writerow(_CSV_HEADER_ROW)
+            
+            # Write data rows (a None remarks is written as an empty cell)
+            for row in rows:
+                timestamp = row['timestamp']
+                if timestamp:
+                    row = {**row, 'timestamp': timestamp.replace('T', ' ')}
+                writer.writerow(row)
+        
+        logger.debug("CSV exported successfully: %s", csv_filepath)
+    except Exception as e:
+        logger.warning("CSV export failed: %s", e)
 
-            # Save file
-            with open(json_filepath, 'w', encoding='utf-8') as jsonfile:
-                jsonfile.write(json_data)
 
-            # Print to console
-            print("JSON exported successfully!")
-            print(json_data)
-            print(f"JSON file saved at: {json_filepath}")
+# --- API Router for CRUD Operations ---
 
-        except Exception as e:
-            print(f"JSON export failed: {e}")
-    # Export to JSON  -------------------
+api_router = APIRouter(prefix="/api")
 
+# Rows are returned as-is (no response_model validation pass); `responses` only
+# documents their shape in /docs
+LIST_RESPONSES = {200: {"model": List[RecordInDB]}}
+CREATE_RESPONSES = {201: {"model": RecordInDB}}
+UPDATE_RESPONSES = {200: {"model": RecordInDB}}
 
-    conn.close()
+# curl -s -X GET "http://127.0.0.1:8000/api/records/all" | jq
+# winget install jqlang.jq
+# this will retrieve all Records (VIEW)
+@api_router.get("/records/all", response_class=ORJSONResponse, responses=LIST_RESPONSES)
+async def get_all_records(request: Request, background: BackgroundTasks, conn: sqlite3.Connection = Depends(get_db)):
+    """Fetch all records from the database with Export to CSV Feature """
+    records = await db_fetch_all(conn, SQL_LIST)
+    # Convert Row → dict once; the response and the debug dump share the list
+    rows = [dict(record) for record in records]
     
-    return [RecordInDB(**dict(record)) for record in records]
+    # Debug file dump runs after the response is sent (see _dump_records_csv)
+    if request.app.state.create_csv:
+        background.add_task(_dump_records_csv, rows)
+
+    return ORJSONResponse(rows)
 
 
 # this will Add a NEW Record to the Database via POST Method 
 # (CRUD - CREATE - INSERT)
-@api_router.post("/records", response_model=RecordInDB, status_code=201)
-async def create_record(record: RecordCreate):
+@api_router.post("/records", response_class=ORJSONResponse, responses=CREATE_RESPONSES, status_code=201)
+async def create_record(record: RecordCreate, conn: sqlite3.Connection = Depends(get_write_db)):
     
-    conn = get_db_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection error.")
-    
-    cursor = conn.cursor()
     try:
-        query = """
-            INSERT INTO records (name, rights, status, remarks)
-            VALUES (?, ?, ?, ?)
-        """
-        cursor.execute(query, (record.name, record.rights, record.status, record.remarks))
-        conn.commit() # excute the Insert of Record
-        
-        new_record_id = cursor.lastrowid
-        new_record = conn.execute("SELECT * FROM records WHERE id = ?", (new_record_id,)).fetchone()
+        # autocommitted once the statement completes
+        new_record = await db_write_fetch_one(
+            conn, SQL_INSERT_RETURNING, (record.name, record.rights, record.status, record.remarks)
+        )
         
         if new_record is None:
             raise HTTPException(status_code=500, detail="Record created but failed to retrieve.")
 
-        conn.close()
-        return RecordInDB(**dict(new_record))
+        return ORJSONResponse(dict(new_record), status_code=201)
         
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="Integrity error: Check unique constraints.")
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Failed to create record: {e}")
 
 
+def _insert_records_bulk(conn, rows):
+    """Inserts rows in one transaction and returns the last new id (runs on a worker thread).
+
+    conn is the writer connection: readers use their own connection, so they only
+    see the batch once it has committed.
+    """
+    with DB_WRITE_LOCK:
+        # The writer connection autocommits, so the batch opens its own transaction
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(SQL_INSERT, rows)
+            # executemany drops RETURNING rows, but AUTOINCREMENT ids within one
+            # locked transaction are consecutive, so the last id gives the range
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return last_id
+
+
+# this will Add many NEW Records in one transaction (one commit for the whole batch)
+# (CRUD - CREATE - BULK INSERT)
+@api_router.post("/records/bulk", status_code=201)
+async def create_records_bulk(records: List[RecordCreate], conn: sqlite3.Connection = Depends(get_write_db)):
+    """Insert a list of records with a single executemany inside one BEGIN/COMMIT."""
+    if not records:
+        return {"inserted": 0, "first_id": None, "last_id": None}
+
+    try:
+        last_id = await run_in_threadpool(
+            _insert_records_bulk, conn, [(r.name, r.rights, r.status, r.remarks) for r in records]
+        )
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="Integrity error: Check unique constraints.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create records: {e}")
+
+    return {"inserted": len(records), "first_id": last_id - len(records) + 1, "last_id": last_id}
+
+
 # (CRUD - UPDATE)
-@api_router.put("/records/{record_id}", response_model=RecordInDB)
-async def update_record(record_id: int, record: RecordUpdate):
+@api_router.put("/records/{record_id}", response_class=ORJSONResponse, responses=UPDATE_RESPONSES)
+async def update_record(record_id: int, record: RecordUpdate, conn: sqlite3.Connection = Depends(get_write_db)):
     """Update an existing record by ID."""
-    conn = get_db_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection error.")
-    
-    updates = []
-    values = []
-    
-    if record.name is not None:
-        updates.append("name = ?")
-        values.append(record.name)
-    if record.rights is not None:
-        updates.append("rights = ?")
-        values.append(record.rights)
-    if record.status is not None:
-        updates.append("status = ?")
-        values.append(record.status)
-    if record.remarks is not None:
-        updates.append("remarks = ?")
-        values.append(record.remarks)
-
-    if not updates:
-        conn.close()
+    fields = (record.name, record.rights, record.status, record.remarks)
+    mask = (
+        (fields[0] is not None)
+        | (fields[1] is not None) << 1
+        | (fields[2] is not None) << 2
+        | (fields[3] is not None) << 3
+    )
+
+    if not mask:
         raise HTTPException(status_code=400, detail="No fields provided for update.")
 
-    updates.append("timestamp = CURRENT_TIMESTAMP")
-    
-    query = f"UPDATE records SET {', '.join(updates)} WHERE id = ?"
+    query = UPDATE_STMTS[mask]
+    values = [value for value in fields if value is not None]
     values.append(record_id)
     
-    cursor = conn.cursor()
     try:
-        cursor.execute(query, tuple(values))
-        conn.commit()
+        updated_record = await db_write_fetch_one(conn, query, tuple(values))  # None when no row has this id
         
-        if cursor.rowcount == 0:
-            conn.close()
+        if updated_record is None:
             raise HTTPException(status_code=404, detail=f"Record with ID {record_id} not found.")
 
-        updated_record = conn.execute("SELECT * FROM records WHERE id = ?", (record_id,)).fetchone()
-        
-        conn.close()
-        return RecordInDB(**dict(updated_record))
+        return ORJSONResponse(dict(updated_record))
         
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Failed to update record: {e}")
 
 # (CRUD - DELETE)
 @api_router.delete("/records/{record_id}", status_code=204)
-async def delete_record(record_id: int):
+async def delete_record(record_id: int, conn: sqlite3.Connection = Depends(get_write_db)):
     """Delete a record by ID."""
-    conn = get_db_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection error.")
-    
-    cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM records WHERE id = ?", (record_id,))
-        conn.commit()
+        deleted = await db_write_rowcount(conn, SQL_DELETE, (record_id,))
         
-        if cursor.rowcount == 0:
-            conn.close()
+        if deleted == 0:
             raise HTTPException(status_code=404, detail=f"Record with ID {record_id} not found.")
             
-        conn.close()
         return JSONResponse(status_code=204, content={"message": "Record deleted successfully."})
 
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Failed to delete record: {e}")
 
 
 # (ETL - VIEW)
-@api_router.post("/search", response_model=List[RecordInDB])
-async def search_records(request: Request):
+@api_router.post("/search", response_class=ORJSONResponse, responses=LIST_RESPONSES)
+async def search_records(request: Request, conn: sqlite3.Connection = Depends(get_db)):
     """Search records by name or remarks only using a text query."""
     try:
         data = await request.json()
 
-        # --- DEBUG PRINT STATEMENT UPDATED TO JSON FORMATTED OUTPUT ---
-        print("--- Formatted Search Payload Received ---")
-        print(json.dumps(data, indent=4))
-        print("------------------------------------------")
+        # --- DEBUG LOG (only formatted when the log level is debug) ---
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("search payload: %s", data)
 
         query_text = data.get("query", "").strip()
     except:
         raise HTTPException(status_code=400, detail="Invalid request body.")
 
     if not query_text:
-        return []
+        return ORJSONResponse([])
 
-    conn = get_db_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection error.")
-    
     # UPDATED: Search only in name and remarks fields
-    lower_query_text = query_text.lower()
-    search_param = f"%{lower_query_text}%"
-    
-    query = """
-        SELECT * FROM records
-        WHERE LOWER(name) LIKE ? OR LOWER(remarks) LIKE ?
-        ORDER BY id DESC
-    """
-    
-    records = conn.execute(query, (search_param, search_param)).fetchall()
-    conn.close()
+    if len(query_text) >= FTS_MIN_QUERY_LENGTH:
+        # Quoted as one FTS5 phrase, so user input is never parsed as FTS syntax
+        fts_query = '"' + query_text.replace('"', '""') + '"'
+        records = await db_fetch_all(conn, SQL_SEARCH_FTS, (fts_query,))
+    else:
+        # SQLite's LIKE already ignores (ASCII) case, so no LOWER() per row
+        search_param = f"%{query_text}%"
+        records = await db_fetch_all(conn, SQL_SEARCH_LIKE, (search_param, search_param))
     
-    return [RecordInDB(**dict(record)) for record in records]
+    return ORJSONResponse([dict(record) for record in records])
+
 
 
 
+def _csv_cell(value):
+    """Formats one text cell the way csv.writer does (QUOTE_MINIMAL), minus its per-cell overhead."""
+    if value and ('"' in value or ',' in value or '\n' in value or '\r' in value):
+        return '"' + value.replace('"', '""') + '"'
+    return value or ''
+
+def iter_records_csv(conn):
+    """Yields the records table as CSV text, EXPORT_BATCH_SIZE rows per chunk.
+
+    Rows are read from the cursor as they are written, so memory stays flat no
+    matter how large the table is. Closes conn when done (or when the client
+    disconnects).
+    """
+    # Write header
+    lines = [_CSV_HEADER_LINE]
+    try:
+        # Write data rows: fixed schema, so each line is one f-string and only
+        # the free-text cells go through _csv_cell
+        cursor = conn.execute(SQL_EXPORT_CSV)
+        for id_, name, rights, status, remarks, timestamp in cursor:
+            lines.append(
+                f"{id_},{_csv_cell(name)},{_csv_cell(rights)},{_csv_cell(status)},"
+                f"{_csv_cell(remarks)},{timestamp or ''}\r\n"
+            )
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                yield "".join(lines)
+                lines.clear()
+        
+        # Flush the header / last partial batch
+        if lines:
+            yield "".join(lines)
+    finally:
+        conn.close()
+
 
 # defines an HTTP endpoint on the Frontend
 # (API for export CSV)
 @api_router.get("/export/csv")
 async def export_records_to_csv():
     """Export all records to CSV file."""
+    # A dedicated connection: the stream outlives this call and must not hold
+    # a read statement open on the shared one
     conn = get_db_connection()
     if conn is None:
         raise HTTPException(status_code=500, detail="Database connection error.")
     
-    records = conn.execute("SELECT * FROM records ORDER BY id DESC").fetchall()
-    conn.close()
-    
-    # Create CSV in memory
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['ID', 'Name', 'Rights', 'Status', 'Remarks', 'Timestamp'])
-    
-    # Write data rows
-    for record in records:
-        writer.writerow([
-            record['id'],
-            record['name'],
-            record['rights'],
-            record['status'],
-            record['remarks'] or '',
-            record['timestamp']
-        ])
-    
-    # Get CSV content
-    output.seek(0)
-    
     # Generate filename with current date
-    filename = f"records_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    filename = _export_filename("csv")
     
-    # Return as downloadable file
+    # Return as downloadable file, streamed straight from the cursor
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter_records_csv(conn),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
+def iter_records_json(conn):
+    """Yields the records table as a JSON array, EXPORT_BATCH_SIZE rows per chunk.
+
+    Each row is encoded with orjson as it comes off the cursor, in the same
+    shape /api/records/all returns. Closes conn when done (or when the client
+    disconnects).
+    """
+    parts = []
+    separator = b""  # no comma before the first batch
+    try:
+        cursor = conn.execute(SQL_LIST)
+        yield b"["
+        for record in cursor:
+            parts.append(orjson.dumps(dict(record)))
+            if len(parts) >= EXPORT_BATCH_SIZE:
+                yield separator + b",".join(parts)
+                separator = b","
+                parts.clear()
+        
+        # Flush the last partial batch and close the array
+        if parts:
+            yield separator + b",".join(parts)
+        yield b"]"
+    finally:
+        conn.close()
+
+
+# (API for export JSON)
+@api_router.get("/export/json")
+async def export_records_to_json():
+    """Export all records to a JSON file, streamed row by row."""
+    # A dedicated connection, as for the CSV export
+    conn = get_db_connection()
+    if conn is None:
+        raise HTTPException(status_code=500, detail="Database connection error.")
+    
+    filename = _export_filename("json")
+    
+    return StreamingResponse(
+        iter_records_json(conn),
+        media_type="application/json",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 
 # Attach the API router ==========================================================
 app.include_router(api_router)
@@ -419,22 +632,14 @@ app.include_router(api_router)
 @app.get("/", response_class=HTMLResponse)
 async def welcome_page(request: Request):
     """The initial welcome page."""
-    return templates.TemplateResponse(
-        name=WELCOME_PAGE,
-        context={"request": request},
-        status_code=200
-    )
+    return HTMLResponse(request.app.state.tmpl_welcome.render({"request": request}), status_code=200)
 
 @app.get("/main", response_class=HTMLResponse)
 async def main_page(request: Request):
     """The main CRUD application page."""
-    return templates.TemplateResponse(
-        name=MAIN_PAGE,
-        context={"request": request},
-        status_code=200
-    )
+    return HTMLResponse(request.app.state.tmpl_main.render({"request": request}), status_code=200)
 
 # --- Server Start Entry Point ---
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level=get_log_level(load_config()))